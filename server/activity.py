@@ -0,0 +1,260 @@
+from flask import has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, select, delete, tuple_
+from database import db
+from models.ActivityModel import ActivityLog
+from models.UsersModel import User
+from models.ProjectsModel import Project, ProjectDocument
+import datetime
+import threading
+import atexit
+import logging
+
+
+TRACKED_MODELS = {
+    User: 'user',
+    Project: 'project',
+    ProjectDocument: 'document',
+}
+
+# Changes to these fields alone are not worth an audit row (e.g. every login touches last_login)
+IGNORED_FIELDS = {'last_login'}
+
+_PENDING_KEY = 'activity_pending'
+# Sessions used outside a Flask request (the async API) put the actor here
+ACTOR_KEY = 'activity_actor'
+
+_writer = None
+
+logger = logging.getLogger(__name__)
+
+
+def _current_actor(session):
+    if ACTOR_KEY in session.info:
+        return session.info[ACTOR_KEY]
+    if not has_request_context():
+        return None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # Route was not protected, so no token was verified
+        return None
+
+
+def _changed_fields(obj):
+    state = inspect(obj)
+    return sorted(
+        attr.key for attr in state.attrs
+        if attr.key not in IGNORED_FIELDS and attr.history.has_changes()
+    )
+
+
+def _entry(obj, action, actor, now, changes = None):
+    return {
+        "created_at": now,
+        "actor": actor,
+        "action": action,
+        "entity_type": TRACKED_MODELS[type(obj)],
+        "entity_id": obj.id,
+        "changes": changes
+    }
+
+
+def _collect_updates(session, flush_context, instances):
+    # Attribute history is reset by the flush, so updates are captured before it
+    actor = _current_actor(session)
+    now = datetime.datetime.now()
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in session.dirty:
+        if type(obj) in TRACKED_MODELS and session.is_modified(obj):
+            changes = _changed_fields(obj)
+            if changes:
+                pending.append(_entry(obj, 'update', actor, now, changes))
+
+
+def _collect_inserts_and_deletes(session, flush_context):
+    # Primary keys of new rows are only known after the flush
+    actor = _current_actor(session)
+    now = datetime.datetime.now()
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in session.new:
+        if type(obj) in TRACKED_MODELS:
+            pending.append(_entry(obj, 'create', actor, now))
+    for obj in session.deleted:
+        if type(obj) in TRACKED_MODELS:
+            pending.append(_entry(obj, 'delete', actor, now))
+
+
+def _enqueue_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and _writer is not None:
+        _writer.enqueue(pending)
+
+
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_session_events(target):
+    """Attaches the activity hooks to a session, scoped session or Session subclass."""
+    event.listen(target, 'before_flush', _collect_updates)
+    event.listen(target, 'after_flush', _collect_inserts_and_deletes)
+    event.listen(target, 'after_commit', _enqueue_committed)
+    event.listen(target, 'after_rollback', _discard_rolled_back)
+
+
+register_session_events(db.session)
+
+
+class ActivityWriter(threading.Thread):
+    """
+    Buffers committed activity entries in memory and writes them with one
+    multi-row INSERT per batch, outside of the request's own transaction.
+    Also runs retention compaction periodically.
+    """
+
+    def __init__(self, app):
+        super().__init__(name = 'k-boss-activity-writer', daemon = True)
+        self.app = app
+        self.batch_size = app.config['ACTIVITY_BATCH_SIZE']
+        self.interval = app.config['ACTIVITY_FLUSH_INTERVAL']
+        self.compaction_interval = app.config['ACTIVITY_COMPACTION_INTERVAL']
+        self.max_buffer = app.config['ACTIVITY_MAX_BUFFER']
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+
+
+    def _trim(self):
+        """Drops the oldest entries beyond max_buffer. Call with the lock held; returns how many were dropped."""
+        overflow = len(self._buffer) - self.max_buffer
+        if overflow <= 0:
+            return 0
+        del self._buffer[:overflow]
+        return overflow
+
+
+    def enqueue(self, entries):
+        with self._lock:
+            self._buffer.extend(entries)
+            dropped = self._trim()
+            full = len(self._buffer) >= self.batch_size
+        if dropped:
+            logger.warning("Activity buffer full, dropped %s oldest entries", dropped)
+        if not self.is_alive() and not self._stop_event.is_set():
+            self._start_once()
+        if full:
+            self._wakeup.set()
+
+
+    def _start_once(self):
+        with self._lock:
+            if not self.is_alive() and self.ident is None:
+                self.start()
+
+
+    def flush(self):
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    for start in range(0, len(entries), self.batch_size):
+                        connection.execute(ActivityLog.__table__.insert(), entries[start:start + self.batch_size])
+        except Exception as e:
+            logger.error("Error writing %s activity entries: %s", len(entries), e)
+            # Put them back so the next flush retries them, within the buffer limit
+            with self._lock:
+                self._buffer[:0] = entries
+                dropped = self._trim()
+            if dropped:
+                logger.warning("Activity buffer full, dropped %s oldest entries", dropped)
+            return 0
+        return len(entries)
+
+
+    def run(self):
+        last_compaction = None
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+            now = datetime.datetime.now()
+            if last_compaction is None or (now - last_compaction).total_seconds() >= self.compaction_interval:
+                try:
+                    with self.app.app_context():
+                        compact_activity(self.app.config['ACTIVITY_RETENTION_DAYS'])
+                except Exception as e:
+                    logger.error("Error compacting activity log: %s", e)
+                last_compaction = now
+
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        self.flush()
+
+
+def init_activity_log(app):
+    """The writer thread is started on the first committed change, not here."""
+    global _writer
+    _writer = ActivityWriter(app)
+    atexit.register(_writer.stop)
+    return _writer
+
+
+def flush_activity():
+    """Writes buffered entries immediately (used before reads that must see them)."""
+    return _writer.flush() if _writer is not None else 0
+
+
+def query_activity(actor = None, entity_type = None, entity_id = None, start = None, end = None, before_id = None, limit = 100):
+    """
+    Returns activity entries, newest first.
+    Every filter combination is served by one of the (…, created_at) indexes;
+    pagination is keyset-based on (created_at, id) via before_id, so deep pages
+    cost the same as the first one.
+    Raises ValueError if entity_id is given without entity_type, or if
+    before_id does not exist (e.g. it was removed by compaction).
+    """
+    if entity_id is not None and entity_type is None:
+        raise ValueError("entity_id requires entity_type")
+    
+    query = ActivityLog.query
+    if actor is not None:
+        query = query.filter(ActivityLog.actor == actor)
+    if entity_type is not None:
+        query = query.filter(ActivityLog.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(ActivityLog.entity_id == entity_id)
+    if start is not None:
+        query = query.filter(ActivityLog.created_at >= start)
+    if end is not None:
+        query = query.filter(ActivityLog.created_at < end)
+    if before_id is not None:
+        cursor = db.session.get(ActivityLog, before_id)
+        if cursor is None:
+            raise ValueError(f"Unknown before_id {before_id}")
+        query = query.filter(tuple_(ActivityLog.created_at, ActivityLog.id) < (cursor.created_at, cursor.id))
+
+    return query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit).all()
+
+
+def compact_activity(retention_days, chunk_size = 10000):
+    """
+    Deletes entries older than retention_days in chunks, committing after each
+    so the table is never locked for long. Returns the number of rows removed.
+    """
+    cutoff = datetime.datetime.now() - datetime.timedelta(days = retention_days)
+    removed = 0
+    while True:
+        ids = select(ActivityLog.id).where(ActivityLog.created_at < cutoff).limit(chunk_size)
+        result = db.session.execute(delete(ActivityLog).where(ActivityLog.id.in_(ids)))
+        db.session.commit()
+        removed += result.rowcount
+        if result.rowcount < chunk_size:
+            return removed
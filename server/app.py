@@ -3,21 +3,30 @@ from flask_cors import CORS
 import requests 
 import json 
 from config import Config
-from database import db, init_db 
+from database import db, init_db, prepare_database 
+from logging_config import init_logging
+from mailer import init_mail, start_mail_sender
+from activity import init_activity_log
 from flask_jwt_extended import JWTManager
+import os
 
 app = Flask(__name__)
 app.config.from_object(Config) 
+init_logging(app)
 CORS(app, resources={r"/*": {"origins": Config.CORS_ORIGINS}})
 
 init_db(app)
+init_mail(app)
+init_activity_log(app)
 jwt = JWTManager(app)
 
 from routs.users import users_bp 
 from routs.projects import projects_bp
+from routs.activity import activity_bp
 
 app.register_blueprint(users_bp, url_prefix = "/api/vi/users")
 app.register_blueprint(projects_bp, url_prefix = "/api/vi/projects")
+app.register_blueprint(activity_bp, url_prefix = "/api/vi/activity")
 
 @app.route('/')
 def home():
@@ -25,8 +34,16 @@ def home():
     return jsonify({"message": "User Service is running!", "status": "OK"})
 
 
+# Startup runs however the app is served (python app.py, flask run, gunicorn, asgi.py)
+with app.app_context():
+    # Ensure database tables are created (and upgrade databases that predate project memberships)
+    prepare_database()
+
+# `python app.py` re-runs this module in a reloader child; the watcher process serves nothing
+_is_reloader_watcher = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if app.config['MAIL_SENDER_ENABLED'] and not _is_reloader_watcher:
+    start_mail_sender(app)
+
+
 if __name__ == '__main__':
-    with app.app_context():
-        # Ensure database tables are created when app is run directly
-        db.create_all()
     app.run(port=5000, debug=True)
\ No newline at end of file
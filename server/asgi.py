@@ -0,0 +1,108 @@
+"""
+ASGI entry point.
+
+Upload, download and read routes of the users and projects APIs are served
+by async handlers (SQLAlchemy asyncio engine over aiosqlite, aiofiles for
+file I/O); every other route falls through to the Flask app, so both share
+the same models, config, permissions, mail queue and activity log.
+
+    uvicorn asgi:application --workers 1
+"""
+from starlette.applications import Starlette
+from starlette.routing import Route, Mount
+from a2wsgi import WSGIMiddleware
+from app import app as flask_app
+from async_database import init_async_db
+from logging_config import request_id_var, new_request_id, log_access
+import time
+from async_routs import users, projects
+
+
+def prefixed(prefix, routes):
+    # Plain routes instead of Mount: a Mount would claim every path under the
+    # prefix, while unmatched paths/methods here must reach the Flask app
+    return [Route(prefix + route.path, route.endpoint, methods = route.methods) for route in routes]
+
+
+class CORSHeaders:
+    """Adds flask-cors' Access-Control-Allow-Origin to async responses (preflights go to Flask)."""
+
+    def __init__(self, app, origins):
+        self.app = app
+        self.origins = {origin.encode() for origin in origins}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        origin = dict(scope['headers']).get(b'origin')
+
+        async def send_with_cors(message):
+            if message['type'] == 'http.response.start' and origin in self.origins:
+                headers = list(message.get('headers', []))
+                if not any(name.lower() == b'access-control-allow-origin' for name, _ in headers):
+                    headers.append((b'access-control-allow-origin', origin))
+                    headers.append((b'vary', b'Origin'))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+class RequestLogging:
+    """
+    Request ids and access records for the ASGI path, mirroring the Flask hooks
+    in logging_config. The id is forwarded to the Flask app as X-Request-ID;
+    responses that already carry the header were logged by Flask, so they are
+    not logged twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope['headers'])
+        request_id = new_request_id(headers.get(b'x-request-id', b'').decode('latin-1'))
+        if b'x-request-id' not in headers:
+            scope = {**scope, 'headers': [*scope['headers'], (b'x-request-id', request_id.encode('latin-1'))]}
+
+        token = request_id_var.set(request_id)
+        start = time.perf_counter()
+        logged_by_flask = False
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal logged_by_flask, status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                response_headers = list(message.get('headers', []))
+                logged_by_flask = any(name.lower() == b'x-request-id' for name, _ in response_headers)
+                if not logged_by_flask:
+                    response_headers.append((b'x-request-id', request_id.encode('latin-1')))
+                    message = {**message, 'headers': response_headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if not logged_by_flask:
+                log_access(scope['method'], scope['path'], status, (time.perf_counter() - start) * 1000)
+            request_id_var.reset(token)
+
+
+def create_asgi_app():
+    starlette_app = Starlette(routes = [
+        *prefixed('/api/vi/users', users.routes),
+        *prefixed('/api/vi/projects', projects.routes),
+        Mount('/', app = WSGIMiddleware(flask_app)),
+    ])
+    # Importing the Flask app already created the tables and started the mail sender
+    starlette_app.state.config = flask_app.config
+    starlette_app.state.sessionmaker = init_async_db(flask_app.config)
+    return RequestLogging(CORSHeaders(starlette_app, flask_app.config['CORS_ORIGINS']))
+
+
+application = create_asgi_app()
@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session
+from activity import register_session_events
+
+
+class AsyncSyncSession(Session):
+    """Session class driven by AsyncSession, so the activity hooks fire for async writes too."""
+
+
+register_session_events(AsyncSyncSession)
+
+
+def to_async_url(url):
+    """sqlite:///path -> sqlite+aiosqlite:///path"""
+    if url.startswith('sqlite:'):
+        return 'sqlite+aiosqlite:' + url[len('sqlite:'):]
+    return url
+
+
+def init_async_db(config):
+    """Returns an async sessionmaker sharing the models and database of the Flask app."""
+    engine = create_async_engine(to_async_url(config['SQLALCHEMY_DATABASE_URI']))
+    return async_sessionmaker(engine, class_ = AsyncSession, sync_session_class = AsyncSyncSession, expire_on_commit = False)
@@ -0,0 +1,88 @@
+from async_routs.responses import json_response
+from sqlalchemy import select, exists
+from sqlalchemy.orm import selectinload
+from models.ProjectsModel import Project, ProjectDocument, ProjectMember
+from permissions import ALL_PERMISSIONS, MEMBER, SELF, permission_scope
+from functools import wraps
+import jwt
+
+
+def decode_access_token(request):
+    """
+    Verifies the same access tokens the Flask app issues (flask_jwt_extended, HS256).
+    Returns the claims, or None if the header is missing or the token is invalid/expired.
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        claims = jwt.decode(header[len('Bearer '):], request.app.state.config['JWT_SECRET_KEY'], algorithms = ['HS256'])
+    except jwt.InvalidTokenError:
+        return None
+    if claims.get('type') != 'access':
+        return None
+    return claims
+
+
+async def load_if_member(session, user_id, code = None, doc_id = None, options = ()):
+    """Async twin of permissions.load_if_member; options are applied to the project query."""
+    if code is not None:
+        query = select(Project).options(*options).where(
+            Project.code == code,
+            exists().where(ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id)
+        )
+    elif doc_id is not None:
+        query = select(ProjectDocument).where(
+            ProjectDocument.id == doc_id,
+            exists().where(ProjectMember.project_id == ProjectDocument.project_id, ProjectMember.user_id == user_id)
+        )
+    else:
+        return None
+    return (await session.execute(query)).scalar()
+
+
+def permission_required(permission):
+    """
+    Async twin of permissions.permission_required for Starlette endpoints.
+    Opens the request's AsyncSession and passes it to the endpoint; the scope
+    and caller are stored on request.state, and so is the project or document
+    loaded by a MEMBER check (with the relationships serialize() needs).
+    """
+    if permission not in ALL_PERMISSIONS:
+        raise ValueError(f"Unknown permission '{permission}'")
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(request):
+            claims = decode_access_token(request)
+            if claims is None:
+                return json_response({"msg": "Missing or invalid Authorization header"}, 401)
+
+            scope = permission_scope(claims.get('role'), permission)
+            if scope is None:
+                return json_response({"error": "Permission denied"}, 403)
+
+            user_id = claims.get('user_id')
+            params = request.path_params
+            if scope == SELF and 'user_id' in params and params['user_id'] != user_id:
+                return json_response({"error": "Permission denied"}, 403)
+
+            async with request.app.state.sessionmaker() as session:
+                if scope == MEMBER and ('code' in params or 'doc_id' in params):
+                    resource = await load_if_member(
+                        session, user_id, code = params.get('code'), doc_id = params.get('doc_id'),
+                        options = (selectinload(Project.documents), selectinload(Project.members))
+                    )
+                    if resource is None:
+                        return json_response({"error": "Permission denied"}, 403)
+                    if 'code' in params:
+                        request.state.project = resource
+                    else:
+                        request.state.document = resource
+
+                request.state.permission_scope = scope
+                request.state.current_user_id = user_id
+                request.state.identity = claims.get('sub')
+                return await fn(request, session)
+        return wrapper
+    return decorator
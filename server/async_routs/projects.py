@@ -0,0 +1,255 @@
+from starlette.routing import Route
+from starlette.responses import FileResponse
+from starlette.datastructures import FormData
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from werkzeug.utils import secure_filename
+from models.ProjectsModel import Project, ProjectDocument, ProjectMember
+from models.UsersModel import User
+from models.NotificationsModel import OutboundEmail
+from mailer import project_documents_message
+from permissions import ANY
+from activity import ACTOR_KEY
+from uploads import guess_mime_type
+from async_routs.auth import permission_required
+from async_routs.responses import json_response
+import aiofiles
+import aiofiles.os
+import asyncio
+import hashlib
+import uuid
+import os
+import logging
+
+
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def _project_query():
+    # serialize() touches documents and members, which cannot lazy-load under asyncio
+    return select(Project).options(selectinload(Project.documents), selectinload(Project.members))
+
+
+async def _load_project(session, code):
+    query = _project_query().where(Project.code == code).execution_options(populate_existing = True)
+    return (await session.scalars(query)).first()
+
+
+async def _get_project(request, session, code):
+    # permission_required already loaded it when the caller is checked for membership
+    return getattr(request.state, 'project', None) or await _load_project(session, code)
+
+
+async def _get_document(request, session, doc_id):
+    return getattr(request.state, 'document', None) or await session.get(ProjectDocument, doc_id)
+
+
+async def _read_data(request):
+    """JSON body or multipart form, like the Flask routes accept."""
+    if request.headers.get('content-type', '').startswith('application/json'):
+        try:
+            return await request.json(), []
+        except ValueError:
+            # Like get_json(silent=True): a malformed body counts as no data, so callers answer 400
+            return None, []
+    form = await request.form()
+    return form, [file for file in form.getlist('documents') if getattr(file, 'filename', None)]
+
+
+async def save_document(upload, project_id, project_folder, validate = True):
+    """Streams and hashes one upload to disk without blocking the event loop and returns its ProjectDocument."""
+    filename = secure_filename(upload.filename)
+    unique_name = f"{uuid.uuid4().hex}_{filename}"
+    file_path = os.path.join(project_folder, unique_name)
+
+    digest = hashlib.sha256()
+    async with aiofiles.open(file_path, 'wb') as out:
+        while chunk := await upload.read(CHUNK_SIZE):
+            digest.update(chunk)
+            await out.write(chunk)
+
+    document = ProjectDocument(
+        project_id = project_id,
+        filename = unique_name,
+        original_filename = filename,
+        file_path = file_path,
+        file_size = await aiofiles.os.path.getsize(file_path),
+        file_type = guess_mime_type(upload.content_type, filename),
+        checksum = digest.hexdigest()
+    )
+
+    if validate:
+        try:
+            document.validate_file_size()
+        except ValueError:
+            await aiofiles.os.remove(file_path)
+            raise
+
+    return document
+
+
+async def save_documents(uploads, project_id, project_folder, max_workers, validate = True):
+    """Async twin of uploads.save_documents, bounded by a semaphore instead of a thread pool."""
+    semaphore = asyncio.Semaphore(max(max_workers, 1))
+
+    async def bounded(upload):
+        async with semaphore:
+            return await save_document(upload, project_id, project_folder, validate)
+
+    results = await asyncio.gather(*(bounded(upload) for upload in uploads), return_exceptions = True)
+    documents = [result for result in results if isinstance(result, ProjectDocument)]
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        await remove_documents(documents)
+        raise errors[0]
+    return documents
+
+
+async def remove_documents(documents):
+    for document in documents:
+        if await aiofiles.os.path.exists(document.file_path):
+            await aiofiles.os.remove(document.file_path)
+
+
+async def queue_project_documents_email(session, project, documents):
+    """Async twin of mailer.queue_project_documents_email."""
+    if not documents:
+        return []
+
+    subject, body = project_documents_message(project, documents)
+    recipients = (await session.scalars(
+        select(User.email).join(ProjectMember, ProjectMember.user_id == User.id)
+        .where(ProjectMember.project_id == project.id, User.isActive == True, User.notifications == True)
+    )).all()
+    emails = [OutboundEmail(kind = 'project_documents', recipient = email, subject = subject, body = body) for email in recipients]
+    session.add_all(emails)
+    return emails
+
+
+@permission_required('projects:create')
+async def create_project(request, session):
+    data, files = await _read_data(request)
+    if not data and not files:
+        return json_response({"error": "No data or files provided for update"}, 400)
+
+    config = request.app.state.config
+    session.info[ACTOR_KEY] = request.state.identity
+    # Read before the try so the error log below can't fail on a non-dict JSON body
+    code = data.get('code') if isinstance(data, (dict, FormData)) else None
+    new_documents = []
+    try:
+        new_project = Project(code = code, description = data.get('description'))
+        session.add(new_project)
+        await session.flush()
+
+        session.add(ProjectMember(project_id = new_project.id, user_id = request.state.current_user_id))
+
+        project_folder = os.path.join(config['PROJECTS_UPLOAD_FOLDER'], code)
+        await aiofiles.os.makedirs(project_folder, exist_ok = True)
+
+        new_documents = await save_documents(files, new_project.id, project_folder, config['UPLOAD_WORKERS'], validate = False)
+        session.add_all(new_documents)
+
+        await queue_project_documents_email(session, new_project, new_documents)
+        await session.commit()
+        return json_response((await _load_project(session, code)).serialize(), 200)
+
+    except Exception as e:
+        await session.rollback()
+        await remove_documents(new_documents)
+        logger.error("Error creating project %s: %s", code, e)
+        return json_response({"error": str(e)}, 500)
+
+
+@permission_required('projects:read')
+async def get_all_projects(request, session):
+    query = _project_query()
+    if request.state.permission_scope != ANY:
+        query = query.join(ProjectMember).where(ProjectMember.user_id == request.state.current_user_id)
+    all_projects = (await session.scalars(query)).all()
+    return json_response([project.serialize() for project in all_projects], 200)
+
+
+@permission_required('projects:read')
+async def get_project_by_code(request, session):
+    project = await _get_project(request, session, request.path_params['code'])
+    if not project:
+        return json_response({"error": "Project not found"}, 404)
+
+    return json_response(project.serialize(), 200)
+
+
+@permission_required('projects:update')
+async def update_project(request, session):
+    code = request.path_params['code']
+    project = await _get_project(request, session, code)
+    if not project:
+        return json_response({"error": "Project not found"}, 404)
+
+    data, files = await _read_data(request)
+    if not data and not files:
+        return json_response({"error": "No data or files provided for update"}, 400)
+
+    config = request.app.state.config
+    session.info[ACTOR_KEY] = request.state.identity
+    new_documents = []
+    try:
+        if 'description' in data:
+            project.description = data['description']
+        if files:
+            project_folder = os.path.join(config['PROJECTS_UPLOAD_FOLDER'], code)
+            await aiofiles.os.makedirs(project_folder, exist_ok = True)
+            new_documents = await save_documents(files, project.id, project_folder, config['UPLOAD_WORKERS'])
+            session.add_all(new_documents)
+
+        await queue_project_documents_email(session, project, new_documents)
+        await session.commit()
+        return json_response((await _load_project(session, code)).serialize(), 200)
+
+    except Exception as e:
+        await session.rollback()
+        await remove_documents(new_documents)
+        logger.error("Error updating project %s: %s", code, e)
+        return json_response({"error": "Failed to update project", "details": str(e)}, 500)
+
+
+@permission_required('documents:delete')
+async def delete_document(request, session):
+    doc_id = request.path_params['doc_id']
+    document = await _get_document(request, session, doc_id)
+    if not document:
+        return json_response({"error": "Document not found"}, 404)
+
+    session.info[ACTOR_KEY] = request.state.identity
+    try:
+        await remove_documents([document])
+        await session.delete(document)
+        await session.commit()
+        return json_response({"message": "Document deleted successfully"}, 200)
+
+    except Exception as e:
+        await session.rollback()
+        logger.error("Error deleting document %s: %s", doc_id, e)
+        return json_response({"error": "Failed to delete document", "details": str(e)}, 500)
+
+
+@permission_required('documents:download')
+async def download_document(request, session):
+    document = await _get_document(request, session, request.path_params['doc_id'])
+    if not document or not await aiofiles.os.path.exists(document.file_path):
+        return json_response({"error": "Document not found"}, 404)
+
+    # FileResponse streams the file in chunks through anyio's async file API
+    return FileResponse(document.file_path, filename = document.original_filename)
+
+
+routes = [
+    Route('/', create_project, methods = ['POST']),
+    Route('/all', get_all_projects, methods = ['GET']),
+    Route('/{code:str}', get_project_by_code, methods = ['GET']),
+    Route('/{code:str}', update_project, methods = ['PUT']),
+    Route('/documents/{doc_id:int}', delete_document, methods = ['DELETE']),
+    Route('/documents/{doc_id:int}/download', download_document, methods = ['GET']),
+]
@@ -0,0 +1,16 @@
+from starlette.responses import Response
+from werkzeug.http import http_date
+import datetime
+import json
+
+
+def _default(value):
+    # Same datetime format Flask's jsonify uses, so both serving paths return identical JSON
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return http_date(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_response(data, status_code = 200):
+    body = json.dumps(data, default = _default, separators = (',', ':'))
+    return Response(body, status_code = status_code, media_type = 'application/json')
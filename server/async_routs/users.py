@@ -0,0 +1,26 @@
+from starlette.routing import Route
+from sqlalchemy import select
+from models.UsersModel import User
+from async_routs.auth import permission_required
+from async_routs.responses import json_response
+
+
+@permission_required('users:read_all')
+async def get_all_users(request, session):
+    users = (await session.scalars(select(User))).all()
+    return json_response([user.serialize() for user in users], 200)
+
+
+@permission_required('users:profile')
+async def get_user_by_id(request, session):
+    user = (await session.scalars(select(User).where(User.email == request.state.identity))).first()
+    if not user:
+        return json_response({"error": "User not found"}, 404)
+    
+    return json_response(user.serialize(), 200)
+
+
+routes = [
+    Route('/all', get_all_users, methods = ['GET']),
+    Route('/profile', get_user_by_id, methods = ['GET']),
+]
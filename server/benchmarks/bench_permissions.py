@@ -0,0 +1,88 @@
+"""
+Microbenchmarks for the authorization layer.
+Run from the server directory:  python benchmarks/bench_permissions.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify, g
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from database import db, init_db
+from permissions import permission_required, permission_scope
+from models.UsersModel import User
+from models.ProjectsModel import Project, ProjectMember
+
+
+REQUESTS = 2000
+
+
+def build_app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:',
+        SQLALCHEMY_TRACK_MODIFICATIONS = False,
+        JWT_SECRET_KEY = 'benchmark',
+        SECRET_KEY = 'benchmark'
+    )
+    init_db(app)
+    JWTManager(app)
+
+    # Like the project routes, each handler loads the project (the member check already did)
+    def load_project(code):
+        project = g.get('project') or Project.query.filter_by(code = code).first()
+        return jsonify({"code": project.code})
+
+    @app.route('/jwt-only/<string:code>')
+    @jwt_required()
+    def jwt_only(code):
+        return load_project(code)
+
+    @app.route('/any/<string:code>')
+    @permission_required('projects:read')
+    def any_scope(code):
+        return load_project(code)
+
+    @app.route('/member/<string:code>')
+    @permission_required('projects:read')
+    def member_scope(code):
+        return load_project(code)
+
+    with app.app_context():
+        db.create_all()
+        user = User(email = 'member@k-boss.local', password = 'x', role = 'team member')
+        project = Project(code = 'BENCH')
+        db.session.add_all([user, project])
+        db.session.flush()
+        db.session.add(ProjectMember(project_id = project.id, user_id = user.id))
+        db.session.commit()
+
+        admin_token = create_access_token(identity = 'admin@k-boss.local', additional_claims = {'role': 'admin', 'user_id': 0})
+        member_token = create_access_token(identity = user.email, additional_claims = {'role': 'team member', 'user_id': user.id})
+
+    return app, admin_token, member_token
+
+
+def time_requests(client, url, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get(url, headers = headers).status_code == 200
+    seconds = timeit.timeit(lambda: client.get(url, headers = headers), number = REQUESTS)
+    return seconds / REQUESTS * 1e6
+
+
+if __name__ == '__main__':
+    lookups = 1_000_000
+    seconds = timeit.timeit(lambda: permission_scope('project manager', 'projects:update'), number = lookups)
+    print(f"compiled lookup:                {seconds / lookups * 1e9:8.1f} ns/check")
+
+    app, admin_token, member_token = build_app()
+    client = app.test_client()
+    baseline = time_requests(client, '/jwt-only/BENCH', admin_token)
+    any_scope = time_requests(client, '/any/BENCH', admin_token)
+    member = time_requests(client, '/member/BENCH', member_token)
+
+    print(f"@jwt_required request:          {baseline:8.1f} us")
+    print(f"@permission_required (any):     {any_scope:8.1f} us  (+{any_scope - baseline:.1f} us)")
+    print(f"@permission_required (member):  {member:8.1f} us  (+{member - baseline:.1f} us)")
@@ -0,0 +1,141 @@
+"""
+Request latency of project creation with 1, 10 and 50 uploaded documents:
+  baseline - the original per-file loop (seek, secure_filename, file.save,
+             getsize, one db.session.add per document, no hashing)
+  serial   - uploads.save_documents with UPLOAD_WORKERS = 1
+  pool     - uploads.save_documents on the shared upload pool
+Every file is larger than Werkzeug's 500 KB in-memory limit, so the form
+parser spools the uploads to temporary files, as it does in production.
+Run from the server directory:  python benchmarks/bench_uploads.py
+"""
+import io
+import os
+import sys
+import uuid
+import shutil
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from werkzeug.utils import secure_filename
+from database import db, init_db
+from models.ProjectsModel import ProjectDocument
+import routs.projects
+import uploads
+
+
+FILE_COUNTS = [1, 10, 50]
+FILE_SIZE = 2 * 1024 * 1024
+SPOOL_LIMIT = 500 * 1024
+POOL_WORKERS = 8
+ROUNDS = 5
+
+
+def baseline_save_documents(files, project_id, project_folder, max_workers, validate = True):
+    """The per-file loop create_project ran before the pool, rows added one at a time."""
+    documents = []
+    for file in files:
+        if file.filename:
+            file.seek(0, 2)
+            file.tell()
+            file.seek(0)
+
+            filename = secure_filename(file.filename)
+            unique_name = f"{uuid.uuid4().hex}_{filename}"
+            file_path = os.path.join(project_folder, unique_name)
+            file.save(file_path)
+
+            document = ProjectDocument(
+                project_id = project_id,
+                filename = unique_name,
+                original_filename = filename,
+                file_path = file_path,
+                file_size = os.path.getsize(file_path),
+                file_type = file.content_type
+            )
+            db.session.add(document)
+            documents.append(document)
+    return documents
+
+
+VARIANTS = {
+    'baseline': (baseline_save_documents, 1),
+    'serial': (uploads.save_documents, 1),
+    'pool': (uploads.save_documents, POOL_WORKERS),
+}
+
+
+def build_app(upload_folder):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(upload_folder, 'bench.db'),
+        SQLALCHEMY_TRACK_MODIFICATIONS = False,
+        JWT_SECRET_KEY = 'benchmark',
+        SECRET_KEY = 'benchmark',
+        PROJECTS_UPLOAD_FOLDER = upload_folder,
+        UPLOAD_WORKERS = 1
+    )
+    init_db(app)
+    JWTManager(app)
+    app.register_blueprint(routs.projects.projects_bp, url_prefix = "/api/vi/projects")
+
+    with app.app_context():
+        db.create_all()
+        token = create_access_token(identity = 'admin@k-boss.local', additional_claims = {'role': 'admin', 'user_id': 1})
+    return app, token
+
+
+def time_create(client, token, count, payload, suffix):
+    documents = [(io.BytesIO(payload), f"file_{i}.bin") for i in range(count)]
+    data = {'code': f"B{suffix}", 'documents': documents}
+    start = time.perf_counter()
+    response = client.post('/api/vi/projects/', data = data, headers = {'Authorization': f'Bearer {token}'},
+                           content_type = 'multipart/form-data')
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_json()
+    assert len(response.get_json()['documents']) == count
+    return elapsed
+
+
+def run_variant(app, client, token, name, count, payload):
+    save_documents, workers = VARIANTS[name]
+    routs.projects.save_documents = save_documents
+    app.config['UPLOAD_WORKERS'] = workers
+    timings = []
+    for round_number in range(ROUNDS):
+        timings.append(time_create(client, token, count, payload, f"{name[0]}{count}_{round_number}"))
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+if __name__ == '__main__':
+    assert FILE_SIZE > SPOOL_LIMIT, "uploads must be large enough to spill to disk"
+    folder = tempfile.mkdtemp(prefix = 'k-boss-bench-')
+    original = routs.projects.save_documents
+    try:
+        app, token = build_app(folder)
+        client = app.test_client()
+        payload = os.urandom(FILE_SIZE)
+
+        print(f"{FILE_SIZE // 1024} KB per file, median of {ROUNDS} requests, "
+              f"pool of {POOL_WORKERS} threads on {os.cpu_count()} CPU(s)")
+        print(f"{'files':>5}  {'baseline':>11}  {'serial':>11}  {'pool':>11}  {'pool vs serial':>14}  {'pool vs baseline':>16}")
+        for count in FILE_COUNTS:
+            results = {name: run_variant(app, client, token, name, count, payload) for name in VARIANTS}
+            print(f"{count:>5}  {results['baseline']:>8.1f} ms  {results['serial']:>8.1f} ms  {results['pool']:>8.1f} ms  "
+                  f"{results['serial'] / results['pool']:>13.2f}x  {results['baseline'] / results['pool']:>15.2f}x")
+
+        # serial and pool do the same work (including SHA-256, which the baseline skips),
+        # so whether the pool pays for itself is decided against serial
+        if results['pool'] < results['serial']:
+            print(f"Pool kept: at {count} files it saves {results['serial'] - results['pool']:.1f} ms over saving "
+                  f"the same files one by one; hashing adds {results['serial'] - results['baseline']:.1f} ms "
+                  f"over the baseline on {os.cpu_count()} CPU(s).")
+        else:
+            print(f"Pool not faster than saving one by one at {count} files "
+                  f"({results['pool']:.1f} vs {results['serial']:.1f} ms): set UPLOAD_WORKERS = 1.")
+    finally:
+        routs.projects.save_documents = original
+        shutil.rmtree(folder)
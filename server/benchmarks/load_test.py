@@ -0,0 +1,69 @@
+"""
+Side-by-side load test of the WSGI (Flask) and ASGI serving paths.
+
+Start each server with the same fixed worker count, e.g.
+
+    gunicorn -w 1 --threads 4 -b 127.0.0.1:5000 app:app
+    uvicorn asgi:application --workers 1 --port 8000
+
+then run, from the server directory,
+
+    python benchmarks/load_test.py --token <access token> --doc-id <document id>
+
+Every client repeatedly downloads the document and reads the project list,
+so the numbers reflect how many slow I/O-bound requests one worker keeps
+in flight at once.
+"""
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, token):
+    request = urllib.request.Request(url, headers = {'Authorization': f'Bearer {token}'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        while response.read(64 * 1024):
+            pass
+    return time.perf_counter() - start
+
+
+def run(base_url, token, doc_id, concurrency, requests_per_client):
+    urls = [
+        f"{base_url}/api/vi/projects/documents/{doc_id}/download",
+        f"{base_url}/api/vi/projects/all",
+    ]
+
+    def client(_):
+        return [fetch(urls[i % len(urls)], token) for i in range(requests_per_client)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = concurrency) as executor:
+        latencies = [latency for batch in executor.map(client, range(concurrency)) for latency in batch]
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p95 ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--wsgi', default = 'http://127.0.0.1:5000')
+    parser.add_argument('--asgi', default = 'http://127.0.0.1:8000')
+    parser.add_argument('--token', required = True)
+    parser.add_argument('--doc-id', type = int, required = True)
+    parser.add_argument('--concurrency', type = int, nargs = '+', default = [1, 8, 32, 64])
+    parser.add_argument('--requests', type = int, default = 20, help = 'requests per client')
+    args = parser.parse_args()
+
+    print(f"{'clients':>7}  {'server':>6}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}")
+    for concurrency in args.concurrency:
+        for name, base_url in (('wsgi', args.wsgi), ('asgi', args.asgi)):
+            result = run(base_url, args.token, args.doc_id, concurrency, args.requests)
+            print(f"{concurrency:>7}  {name:>6}  {result['requests/s']:>8.1f}  {result['p50 ms']:>8.1f}  {result['p95 ms']:>8.1f}")
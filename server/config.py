@@ -24,7 +24,53 @@ class Config:
     # Upload folder for profile pictures
     UPLOAD_FOLDER = os.path.join(BASEDIR, 'static', 'profile_pics')
     PROJECTS_UPLOAD_FOLDER = os.path.join(BASEDIR, 'uploads', 'projects')
+    # Threads shared by all requests for writing and hashing uploaded project documents (1 = sequential)
+    UPLOAD_WORKERS = 8
     
     JWT_SECRET_KEY = 'your-super-secret-jwt-key'  # Use environment variable in production
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
\ No newline at end of file
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Outgoing mail. For local testing run a debugging SMTP server:
+    #   python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 1025))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'false').lower() == 'true'
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'false').lower() == 'true'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'no-reply@k-boss.local')
+    
+    # Background sender: messages per SMTP connection, idle poll interval (seconds),
+    # and retry policy (delay doubles after each failed attempt)
+    MAIL_BATCH_SIZE = 50
+    MAIL_POLL_INTERVAL = 5
+    MAIL_MAX_ATTEMPTS = 5
+    MAIL_RETRY_BACKOFF = 30
+    # Seconds a claimed batch may stay in the sending state before another sender takes it over
+    MAIL_CLAIM_TIMEOUT = 600
+    MAIL_SENDER_ENABLED = os.environ.get('MAIL_SENDER_ENABLED', 'true').lower() == 'true'
+    
+    # Frontend page that handles password reset links
+    FRONTEND_RESET_PASSWORD_URL = 'http://localhost:3000/reset-password'
+    
+    # Activity log: entries per bulk INSERT, max seconds an entry waits in memory,
+    # and how long entries are kept before compaction removes them.
+    # If writes keep failing, only the newest ACTIVITY_MAX_BUFFER entries are kept in memory
+    ACTIVITY_BATCH_SIZE = 500
+    ACTIVITY_MAX_BUFFER = 50000
+    ACTIVITY_FLUSH_INTERVAL = 2
+    ACTIVITY_RETENTION_DAYS = 365
+    ACTIVITY_COMPACTION_INTERVAL = 86400
+    
+    # Logging: root level, plus overrides per logger (module) name
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = {
+        'access': 'INFO',
+        'routs': 'INFO',
+        'async_routs': 'INFO',
+        'mailer': 'INFO',
+        'activity': 'INFO',
+        'werkzeug': 'WARNING',
+        'sqlalchemy.engine': 'WARNING',
+    }
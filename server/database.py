@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 import os 
 import sys 
 
@@ -11,14 +12,61 @@ def init_db(app):
     
 def create_db_tables(app):
     with app.app_context():
-        db.create_all()
+        added = prepare_database()
         print("Database tables created")
+        if added:
+            print(f"Added {added} project memberships for existing projects")
+        
+        
+def prepare_database():
+    """
+    Creates missing tables and adds project_documents.checksum to older
+    databases. When this creates project_members in a database that
+    predates it, the membership backfill runs once; an existing (even empty)
+    project_members table is never touched. Needs an app context.
+    Returns the number of memberships added.
+    """
+    from models.ProjectsModel import ProjectDocument, ProjectMember
+    
+    inspector = inspect(db.engine)
+    upgrading = not inspector.has_table(ProjectMember.__tablename__)
+    documents_table = ProjectDocument.__tablename__
+    missing_checksum = inspector.has_table(documents_table) and \
+        'checksum' not in {column['name'] for column in inspector.get_columns(documents_table)}
+    db.create_all()
+    if missing_checksum:
+        # create_all() never alters existing tables
+        db.session.execute(text(f"ALTER TABLE {documents_table} ADD COLUMN checksum VARCHAR(64)"))
+        db.session.commit()
+    return backfill_project_members() if upgrading else 0
+        
+        
+def backfill_project_members():
+    """
+    One-off upgrade step for databases created before project membership existed:
+    every non-admin user is made a member of every existing project so they keep
+    the access they had. Only prepare_database() calls it, right after creating
+    the project_members table.
+    """
+    from models.ProjectsModel import Project, ProjectMember
+    from models.UsersModel import User
+    
+    project_ids = [project_id for (project_id,) in db.session.query(Project.id)]
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.role.notin_(['root', 'admin']))]
+    memberships = [
+        ProjectMember(project_id = project_id, user_id = user_id)
+        for project_id in project_ids for user_id in user_ids
+    ]
+    db.session.add_all(memberships)
+    db.session.commit()
+    return len(memberships)
         
         
 if __name__ == '__main__':
     from flask import Flask 
     from config import Config
-    from models.UsersModel import Users
+    from models.UsersModel import User
+    from models.ProjectsModel import Project, ProjectMember
     
     print("Attempting to create database tables...")
     app = Flask(__name__)
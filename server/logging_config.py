@@ -0,0 +1,137 @@
+from flask import g, request
+from flask.logging import default_handler
+import logging
+import logging.handlers
+import atexit
+import queue
+import json
+import time
+import uuid
+import copy
+import sys
+import contextvars
+
+
+access_logger = logging.getLogger('access')
+
+# Id of the request being handled; set by the Flask hooks below and by the ASGI middleware in asgi.py
+request_id_var = contextvars.ContextVar('request_id', default = None)
+
+_listener = None
+
+# Attributes every LogRecord has; anything else was passed through `extra` and goes into the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra` fields passed to the log call."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default = str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tags records logged during a request (Flask or async) with its id."""
+
+    def filter(self, record):
+        request_id = request_id_var.get()
+        if request_id is not None:
+            record.request_id = request_id
+        return True
+
+
+def new_request_id(header_value = None):
+    return header_value or uuid.uuid4().hex
+
+
+def log_access(method, path, status, duration_ms):
+    access_logger.info(
+        "%s %s %s", method, path, status,
+        extra = {
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration_ms, 2) if duration_ms is not None else None,
+        }
+    )
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Only renders the message and traceback in the calling thread (so later
+    changes to the arguments can't leak in); JSON encoding and the actual
+    write happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def init_logging(app):
+    """
+    Routes all logging through an in-memory queue drained by a background
+    listener, so log calls in request handlers never wait on stdout.
+    Levels come from LOG_LEVEL (root) and LOG_LEVELS (per logger name).
+    """
+    global _listener
+
+    if _listener is None:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level = True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    logging.getLogger().setLevel(app.config['LOG_LEVEL'])
+    for name, level in app.config['LOG_LEVELS'].items():
+        logging.getLogger(name).setLevel(level)
+
+    # Flask's own handler would write to stderr synchronously; let records propagate to the queue instead
+    app.logger.removeHandler(default_handler)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+        g.request_id_token = request_id_var.set(g.request_id)
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        duration_ms = (time.perf_counter() - g.request_start) * 1000 if 'request_start' in g else None
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        log_access(request.method, request.path, response.status_code, duration_ms)
+        return response
+
+    @app.teardown_request
+    def clear_request_id(exc):
+        if 'request_id_token' in g:
+            request_id_var.reset(g.request_id_token)
@@ -0,0 +1,238 @@
+from flask_mail import Mail, Message
+from database import db
+from sqlalchemy import update
+from models.NotificationsModel import OutboundEmail
+import datetime
+import threading
+import sys
+import logging
+
+
+mail = Mail()
+
+_sender = None
+
+logger = logging.getLogger(__name__)
+
+
+def init_mail(app):
+    mail.init_app(app)
+
+
+def queue_email(kind, recipient, subject, body):
+    """
+    Adds a message to the outbound queue.
+    The row is only added to the session, so it is committed (or rolled back)
+    together with the request's own changes and never sent for a failed request.
+    """
+    email = OutboundEmail(kind = kind, recipient = recipient, subject = subject, body = body)
+    db.session.add(email)
+    return email
+
+
+def queue_welcome_email(user, set_password_url):
+    body = (
+        f"Hello {user.first_name or user.email},\n\n"
+        f"An account has been created for you on K-Boss.\n\n"
+        f"Email: {user.email}\n\n"
+        f"Choose your password here:\n{set_password_url}\n\n"
+        f"The link can be used once and expires in 24 hours."
+    )
+    return queue_email('welcome', user.email, "Welcome to K-Boss", body)
+
+
+def queue_password_reset_email(user, reset_url):
+    body = (
+        f"Hello {user.first_name or user.email},\n\n"
+        f"To reset your password, visit the following link:\n{reset_url}\n\n"
+        f"If you did not make this request, simply ignore this email."
+    )
+    return queue_email('password_reset', user.email, "K-Boss password reset", body)
+
+
+def project_documents_message(project, documents):
+    """Returns (subject, body) of the new-documents notification."""
+    names = "\n".join(f"- {document.original_filename}" for document in documents)
+    subject = f"New documents in project {project.code}"
+    body = (
+        f"The following documents were uploaded to project {project.code}:\n\n"
+        f"{names}"
+    )
+    return subject, body
+
+
+def queue_project_documents_email(project, documents):
+    """Notifies the project's active members who have notifications enabled about new documents."""
+    from models.UsersModel import User
+    from models.ProjectsModel import ProjectMember
+
+    if not documents:
+        return []
+
+    subject, body = project_documents_message(project, documents)
+    recipients = User.query.join(ProjectMember, ProjectMember.user_id == User.id) \
+        .filter(ProjectMember.project_id == project.id, User.isActive == True, User.notifications == True) \
+        .with_entities(User.email).all()
+    return [queue_email('project_documents', email, subject, body) for (email,) in recipients]
+
+
+def _claim_batch(batch_size, claim_timeout):
+    """
+    Moves up to batch_size due messages to the sending state and returns them.
+    Each row is claimed with a conditional UPDATE, so when several senders run
+    (e.g. one per server worker) a message is only ever claimed by one of them.
+    While claimed, next_attempt_at holds the time the claim expires.
+    """
+    now = datetime.datetime.now()
+    candidate_ids = [email_id for (email_id,) in db.session.query(OutboundEmail.id).filter(
+        OutboundEmail.status == OutboundEmail.STATUS_PENDING,
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(OutboundEmail.next_attempt_at).limit(batch_size)]
+
+    claim_expires = now + datetime.timedelta(seconds = claim_timeout)
+    claimed_ids = []
+    for email_id in candidate_ids:
+        result = db.session.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.id == email_id, OutboundEmail.status == OutboundEmail.STATUS_PENDING)
+            .values(status = OutboundEmail.STATUS_SENDING, next_attempt_at = claim_expires)
+        )
+        if result.rowcount == 1:
+            claimed_ids.append(email_id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    return OutboundEmail.query.filter(OutboundEmail.id.in_(claimed_ids)).all()
+
+
+def send_pending_batch(app):
+    """
+    Sends one batch of due messages over a single SMTP connection.
+    Returns the number of messages claimed.
+    """
+    max_attempts = app.config['MAIL_MAX_ATTEMPTS']
+    backoff = app.config['MAIL_RETRY_BACKOFF']
+
+    with app.app_context():
+        _recover_stale()
+        batch = _claim_batch(app.config['MAIL_BATCH_SIZE'], app.config['MAIL_CLAIM_TIMEOUT'])
+        if not batch:
+            return 0
+
+        try:
+            with mail.connect() as connection:
+                for email in batch:
+                    try:
+                        connection.send(Message(
+                            subject = email.subject,
+                            recipients = [email.recipient],
+                            body = email.body
+                        ))
+                        email.mark_sent()
+                    except Exception as e:
+                        logger.error("Error sending email %s to %s: %s", email.id, email.recipient, e)
+                        email.mark_failed(e, max_attempts, backoff)
+        except Exception as e:
+            # Connection could not be opened (or dropped): retry everything not yet sent
+            logger.error("Error connecting to mail server: %s", e)
+            for email in batch:
+                if email.status == OutboundEmail.STATUS_SENDING:
+                    email.mark_failed(e, max_attempts, backoff)
+
+        db.session.commit()
+        return len(batch)
+
+
+def _recover_stale():
+    """
+    Messages whose claim expired (their sender crashed mid-batch) are put back
+    in the queue. Claims held by live senders are left alone.
+    """
+    db.session.execute(
+        update(OutboundEmail)
+        .where(
+            OutboundEmail.status == OutboundEmail.STATUS_SENDING,
+            OutboundEmail.next_attempt_at <= datetime.datetime.now()
+        )
+        .values(status = OutboundEmail.STATUS_PENDING)
+    )
+    db.session.commit()
+
+
+def _clear_final_bodies():
+    """Empties bodies of messages that are already sent or failed (older rows kept them)."""
+    db.session.execute(
+        update(OutboundEmail)
+        .where(
+            OutboundEmail.status.in_([OutboundEmail.STATUS_SENT, OutboundEmail.STATUS_FAILED]),
+            OutboundEmail.body != ''
+        )
+        .values(body = '')
+    )
+    db.session.commit()
+
+
+class MailSender(threading.Thread):
+    """Background thread that drains the outbound queue."""
+
+    def __init__(self, app):
+        super().__init__(name = 'k-boss-mail-sender', daemon = True)
+        self.app = app
+        self.interval = app.config['MAIL_POLL_INTERVAL']
+        self._stop_event = threading.Event()
+
+
+    def run(self):
+        try:
+            with self.app.app_context():
+                _clear_final_bodies()
+        except Exception as e:
+            logger.error("Error clearing sent email bodies: %s", e)
+        while not self._stop_event.is_set():
+            try:
+                sent = send_pending_batch(self.app)
+            except Exception as e:
+                logger.error("Mail sender error: %s", e)
+                sent = 0
+            # A full batch means there may be more waiting, so poll again right away
+            if sent < self.app.config['MAIL_BATCH_SIZE']:
+                self._stop_event.wait(self.interval)
+
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def start_mail_sender(app):
+    global _sender
+    if _sender is None or not _sender.is_alive():
+        _sender = MailSender(app)
+        _sender.start()
+    return _sender
+
+
+if __name__ == '__main__':
+    # Run the sender as a standalone worker:  python mailer.py
+    # For local testing, start a debugging SMTP server first:
+    #   python -m aiosmtpd -n -l localhost:1025
+    from flask import Flask
+    from config import Config
+    from database import init_db, prepare_database
+    from logging_config import init_logging
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_logging(app)
+    init_db(app)
+    init_mail(app)
+
+    with app.app_context():
+        prepare_database()
+
+    print("Mail sender running...")
+    try:
+        sender = MailSender(app)
+        sender.run()
+    except KeyboardInterrupt:
+        sys.exit(0)
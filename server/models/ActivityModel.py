@@ -0,0 +1,49 @@
+from database import db 
+from sqlalchemy import event, DDL
+import datetime 
+
+
+class ActivityLog(db.Model):
+    """
+    Append-only record of who created, updated or deleted users, projects and documents.
+    Rows are written in bulk by activity.py and never updated (enforced by a trigger on SQLite);
+    old rows are only removed by retention compaction.
+    """
+    __tablename__ = 'activity_log'
+    
+    id = db.Column(db.Integer, primary_key = True)
+    created_at = db.Column(db.DateTime, nullable = False, default = datetime.datetime.now)
+    actor = db.Column(db.String(80), nullable = True)  # JWT identity (email), None for system changes
+    action = db.Column(db.String(10), nullable = False)  # create, update, delete
+    entity_type = db.Column(db.String(50), nullable = False)
+    entity_id = db.Column(db.Integer, nullable = True)
+    changes = db.Column(db.JSON, nullable = True)  # names of the changed fields
+    
+    # Every query filters on a time range, so created_at trails each composite index
+    __table_args__ = (
+        db.Index('ix_activity_log_created_at', 'created_at'),
+        db.Index('ix_activity_log_actor_created_at', 'actor', 'created_at'),
+        db.Index('ix_activity_log_entity_created_at', 'entity_type', 'entity_id', 'created_at'),
+    )
+    
+    
+    def serialize(self):
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "actor": self.actor,
+            "action": self.action,
+            "entity_type": self.entity_type,
+            "entity_id": self.entity_id,
+            "changes": self.changes
+        }
+
+
+event.listen(
+    ActivityLog.__table__,
+    'after_create',
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS activity_log_no_update BEFORE UPDATE ON activity_log "
+        "BEGIN SELECT RAISE(ABORT, 'activity_log is append-only'); END"
+    ).execute_if(dialect = 'sqlite')
+)
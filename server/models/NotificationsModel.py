@@ -0,0 +1,78 @@
+from database import db 
+import datetime 
+
+
+class OutboundEmail(db.Model):
+    """
+    Durable outbound mail queue.
+    Rows are written in the same transaction as the change that triggers them
+    and drained in batches by the background sender in mailer.py.
+    """
+    __tablename__ = 'outbound_emails'
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key = True)
+    kind = db.Column(db.String(50), nullable = False)  # welcome, password_reset, project_documents
+    recipient = db.Column(db.String(80), nullable = False)
+    subject = db.Column(db.String(255), nullable = False)
+    body = db.Column(db.Text, nullable = False)
+    status = db.Column(db.String(20), nullable = False, default = STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable = False, default = 0)
+    last_error = db.Column(db.Text, nullable = True)
+    next_attempt_at = db.Column(db.DateTime, nullable = False, default = datetime.datetime.now)
+    created_at = db.Column(db.DateTime, default = datetime.datetime.now)
+    sent_at = db.Column(db.DateTime, nullable = True)
+    
+    __table_args__ = (
+        db.Index('ix_outbound_emails_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    
+    def __init__(self, kind, recipient, subject, body):
+        self.kind = kind 
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.status = self.STATUS_PENDING
+        self.attempts = 0
+        self.next_attempt_at = datetime.datetime.now()
+        
+        
+    def mark_sent(self):
+        self.status = self.STATUS_SENT
+        self.sent_at = datetime.datetime.now()
+        self.last_error = None
+        # Bodies can hold one-time links; nothing needs them once the message is final
+        self.body = ''
+        
+        
+    def mark_failed(self, error, max_attempts, backoff_seconds):
+        """Schedule a retry with exponential backoff, or give up after max_attempts."""
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= max_attempts:
+            self.status = self.STATUS_FAILED
+            self.body = ''
+        else:
+            self.status = self.STATUS_PENDING
+            delay = backoff_seconds * (2 ** (self.attempts - 1))
+            self.next_attempt_at = datetime.datetime.now() + datetime.timedelta(seconds = delay)
+            
+            
+    def serialize(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "recipient": self.recipient,
+            "subject": self.subject,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "next_attempt_at": self.next_attempt_at,
+            "created_at": self.created_at,
+            "sent_at": self.sent_at
+        }
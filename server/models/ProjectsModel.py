@@ -10,6 +10,7 @@ class Project(db.Model):
     description = db.Column(db.Text, nullable = True)
     created_at = db.Column(db.DateTime, default=datetime.datetime.now)
     documents = db.relationship('ProjectDocument', backref='project', lazy=True, cascade='all, delete-orphan')
+    members = db.relationship('ProjectMember', backref='project', lazy=True, cascade='all, delete-orphan')
     
     
     def __init__(self, code, description = None):
@@ -27,7 +28,8 @@ class Project(db.Model):
             "code": self.code,
             "description": self.description, 
             "created_at": self.created_at,
-            "documents": [document.serialize() for document in self.documents]
+            "documents": [document.serialize() for document in self.documents],
+            "members": [member.user_id for member in self.members]
         }
     
     
@@ -43,15 +45,17 @@ class ProjectDocument(db.Model):
     file_path = db.Column(db.String(500), nullable=False)
     file_size = db.Column(db.Integer, nullable=False)  # in bytes
     file_type = db.Column(db.String(100), nullable=False)  # MIME type
+    checksum = db.Column(db.String(64), nullable=True)  # SHA-256 hex, NULL for documents uploaded before it existed
     uploaded_at = db.Column(db.DateTime, default=datetime.datetime.now)
     
-    def __init__(self, project_id, filename, original_filename, file_path, file_size, file_type):
+    def __init__(self, project_id, filename, original_filename, file_path, file_size, file_type, checksum = None):
         self.project_id = project_id
         self.filename = filename
         self.original_filename = original_filename
         self.file_path = file_path
         self.file_size = file_size 
         self.file_type = file_type 
+        self.checksum = checksum
         
         
     def validate_file_size(self):
@@ -71,5 +75,32 @@ class ProjectDocument(db.Model):
             "file_path": self.file_path,
             "file_size": self.file_size,
             "file_type": self.file_type,
+            "checksum": self.checksum,
             "uploaded_at": self.uploaded_at
-        } 
\ No newline at end of file
+        } 
+
+
+
+class ProjectMember(db.Model):
+    __tablename__ = 'project_members'
+    
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    added_at = db.Column(db.DateTime, default=datetime.datetime.now)
+    
+    # The primary key covers lookups by project; this one covers "projects of a user"
+    __table_args__ = (
+        db.Index('ix_project_members_user_project', 'user_id', 'project_id'),
+    )
+    
+    def __init__(self, project_id, user_id):
+        self.project_id = project_id
+        self.user_id = user_id
+        
+        
+    def serialize(self):
+        return {
+            "project_id": self.project_id,
+            "user_id": self.user_id,
+            "added_at": self.added_at
+        }
@@ -1,6 +1,7 @@
 from database import db
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime 
+import hashlib
 from itsdangerous import URLSafeTimedSerializer as Serializer, SignatureExpired, BadTimeSignature 
 from flask import current_app 
 
@@ -41,26 +42,45 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password) 
     
-    def get_reset_token(self, expires_sec = 1800):
-        s = Serializer(current_app.config['SECRET_KEY'], expires_sec)
-        return s.dumps({'user_id': self.id}).decode('utf-8')
+    def _password_fingerprint(self):
+        # Tokens carry a digest of the current hash, so they stop working once the password changes
+        return hashlib.sha256(self.password_hash.encode('utf-8')).hexdigest()[:16]
+    
+    def get_reset_token(self, purpose = 'reset'):
+        """
+        purpose 'reset' is for password reset requests, 'welcome' for the
+        set-password link sent to new accounts (valid for longer).
+        """
+        s = Serializer(current_app.config['SECRET_KEY'], salt = 'password-reset')
+        return s.dumps({'user_id': self.id, 'pw': self._password_fingerprint(), 'purpose': purpose})
     
     @staticmethod
-    def verify_reset_token(token):
+    def verify_reset_token(token, expires_sec = None):
         """
         Verifies a password reset token.
         Returns the User object if the token is valid and not expired, otherwise None.
         """
-        s = Serializer(current_app.config['SECRET_KEY'])
+        s = Serializer(current_app.config['SECRET_KEY'], salt = 'password-reset')
         try:
-            user_id = s.loads(token)['user_id']
+            payload, issued_at = s.loads(token, return_timestamp = True)
+            user_id = payload['user_id']
         except (SignatureExpired, BadTimeSignature):
-            # Token is expired or invalid
+            # Token is invalid
             return None
         except Exception:
             # Catch any other unexpected errors during token loading
             return None
-        return User.query.get(user_id)
+        if expires_sec is None:
+            expires_sec = current_app.config['EMAIL_VERIFICATION_TOKEN_EXPIRATION'] \
+                if payload.get('purpose') == 'welcome' else current_app.config['PASSWORD_RESET_TOKEN_EXPIRATION']
+        if (datetime.datetime.now(datetime.timezone.utc) - issued_at).total_seconds() > expires_sec:
+            # Token is expired
+            return None
+        user = User.query.get(user_id)
+        if not user or payload.get('pw') != user._password_fingerprint():
+            # Token was already used (or the password was changed since it was issued)
+            return None
+        return user
     
     
     def serialize(self):
@@ -0,0 +1,143 @@
+from flask import jsonify, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from functools import wraps
+from sqlalchemy import select, exists
+from database import db
+
+
+# Scopes a permission can be granted with:
+#   ANY     - on every resource
+#   MEMBER  - only on projects the caller is a member of
+#   SELF    - only on the caller's own user record
+ANY = 'any'
+MEMBER = 'member'
+SELF = 'self'
+
+ALL_PERMISSIONS = [
+    'users:create', 'users:read_all', 'users:update', 'users:delete', 'users:toggle_status',
+    'users:profile', 'users:change_password',
+    'projects:create', 'projects:read', 'projects:update', 'projects:delete', 'projects:manage_members',
+    'documents:delete', 'documents:download',
+    'activity:read',
+]
+
+# Declarative permission matrix: role -> {permission: scope}
+PERMISSION_MATRIX = {
+    'root': {permission: ANY for permission in ALL_PERMISSIONS},
+    'admin': {permission: ANY for permission in ALL_PERMISSIONS},
+    'project manager': {
+        'users:read_all': ANY,
+        'users:update': SELF,
+        'users:profile': SELF,
+        'users:change_password': SELF,
+        'projects:create': ANY,
+        'projects:read': MEMBER,
+        'projects:update': MEMBER,
+        'projects:manage_members': MEMBER,
+        'documents:delete': MEMBER,
+        'documents:download': MEMBER,
+    },
+    'team member': {
+        'users:update': SELF,
+        'users:profile': SELF,
+        'users:change_password': SELF,
+        'projects:read': MEMBER,
+        'documents:download': MEMBER,
+    },
+}
+
+ALLOWED_ROLES = list(PERMISSION_MATRIX)
+
+
+def compile_permissions(matrix):
+    """
+    Flattens the matrix into a {(role, permission): scope} dict so each check
+    is a single hash lookup. Raises ValueError on unknown permissions or scopes.
+    """
+    compiled = {}
+    for role, grants in matrix.items():
+        for permission, scope in grants.items():
+            if permission not in ALL_PERMISSIONS:
+                raise ValueError(f"Unknown permission '{permission}' for role '{role}'")
+            if scope not in (ANY, MEMBER, SELF):
+                raise ValueError(f"Unknown scope '{scope}' for {role}/{permission}")
+            compiled[(role, permission)] = scope
+    return compiled
+
+
+_COMPILED = compile_permissions(PERMISSION_MATRIX)
+
+
+def permission_scope(role, permission):
+    """Returns the scope the role holds the permission with, or None."""
+    return _COMPILED.get((role, permission))
+
+
+def has_permission(role, permission, scope = ANY):
+    return _COMPILED.get((role, permission)) == scope
+
+
+def token_claims(user):
+    """Claims embedded in access tokens so routes never reload the user for authorization."""
+    return {'role': user.role, 'user_id': user.id}
+
+
+def load_if_member(user_id, code = None, doc_id = None):
+    """
+    Returns the project (by code) or document (by id) if the user is a member
+    of its project, otherwise None. Loading the row and checking membership is
+    one query: a Core EXISTS on the indexed project_members key.
+    """
+    from models.ProjectsModel import Project, ProjectDocument, ProjectMember
+
+    if code is not None:
+        query = select(Project).where(
+            Project.code == code,
+            exists().where(ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id)
+        )
+    elif doc_id is not None:
+        query = select(ProjectDocument).where(
+            ProjectDocument.id == doc_id,
+            exists().where(ProjectMember.project_id == ProjectDocument.project_id, ProjectMember.user_id == user_id)
+        )
+    else:
+        return None
+    return db.session.execute(query).scalar()
+
+
+def permission_required(permission):
+    """
+    Route decorator: verifies the JWT and checks the role claim against the
+    compiled matrix. MEMBER scopes are resolved from a `code` or `doc_id`
+    route argument and SELF scopes from `user_id`; routes without those
+    arguments read g.permission_scope and filter results themselves.
+    """
+    if permission not in ALL_PERMISSIONS:
+        raise ValueError(f"Unknown permission '{permission}'")
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+            scope = _COMPILED.get((claims.get('role'), permission))
+            if scope is None:
+                return jsonify({"error": "Permission denied"}), 403
+
+            user_id = claims.get('user_id')
+            if scope == SELF and 'user_id' in kwargs and kwargs['user_id'] != user_id:
+                return jsonify({"error": "Permission denied"}), 403
+            if scope == MEMBER and ('code' in kwargs or 'doc_id' in kwargs):
+                resource = load_if_member(user_id, code = kwargs.get('code'), doc_id = kwargs.get('doc_id'))
+                if resource is None:
+                    return jsonify({"error": "Permission denied"}), 403
+                if 'code' in kwargs:
+                    g.project = resource
+                else:
+                    g.document = resource
+
+            g.permission_scope = scope
+            g.current_user_id = user_id
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,64 @@
+from flask import Blueprint, request, jsonify
+from activity import query_activity, flush_activity
+from permissions import permission_required
+import datetime 
+
+
+activity_bp = Blueprint('activity_bp', __name__)
+
+MAX_PAGE_SIZE = 500
+
+
+def parse_datetime(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def parse_int(name, default = None):
+    """Reads an integer query param; raises ValueError naming the param if it is not one."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}, expected an integer")
+
+
+@activity_bp.route('/', methods = ['GET'])
+@permission_required('activity:read')
+def get_activity():
+    """
+    Lists activity entries, newest first.
+    Query params: actor, entity_type, entity_id, start, end (ISO datetimes),
+    before_id (id of the last entry of the previous page), limit.
+    """
+    try:
+        entity_id = parse_int('entity_id')
+        before_id = parse_int('before_id')
+        # Out-of-range limits are clamped, so ?limit=-1 can't turn into "no limit"
+        limit = max(1, min(parse_int('limit', 100), MAX_PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        start = parse_datetime(request.args.get('start'))
+        end = parse_datetime(request.args.get('end'))
+    except ValueError:
+        return jsonify({"error": "Invalid datetime, expected ISO format"}), 400
+    
+    # Make entries still buffered in memory visible to this read
+    flush_activity()
+    
+    try:
+        entries = query_activity(
+            actor = request.args.get('actor'),
+            entity_type = request.args.get('entity_type'),
+            entity_id = entity_id,
+            start = start,
+            end = end,
+            before_id = before_id,
+            limit = limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([entry.serialize() for entry in entries]), 200
@@ -1,24 +1,37 @@
-from flask import Blueprint, request, Response, jsonify, url_for, current_app, redirect, send_file 
+from flask import Blueprint, request, Response, jsonify, url_for, current_app, redirect, send_file, g 
 import requests
 from config import Config 
-from models.ProjectsModel import Project, ProjectDocument
+from models.ProjectsModel import Project, ProjectDocument, ProjectMember
+from models.UsersModel import User
 from database import db
+from mailer import queue_project_documents_email
+from permissions import ANY, permission_required
+from uploads import save_documents, remove_documents
 import string
 import random
 import os
-from werkzeug.utils import secure_filename
-import uuid
 from PIL import Image
 import datetime 
-from flask_jwt_extended import jwt_required, get_jwt_identity
 import shutil
+import logging
 
 
 projects_bp = Blueprint('proejects_pb', __name__)
 
+logger = logging.getLogger(__name__)
+
+
+def _get_project(code):
+    # permission_required already loaded it when the caller is checked for membership
+    return g.get('project') or Project.query.filter_by(code = code).first()
+
+
+def _get_document(doc_id):
+    return g.get('document') or db.session.get(ProjectDocument, doc_id)
+
 
 @projects_bp.route('/', methods = ['POST'])
-@jwt_required()
+@permission_required('projects:create')
 def create_project():
     
     data = request.get_json(silent = True)
@@ -29,8 +42,10 @@ def create_project():
     if not data and not request.files:
         return jsonify({"error": "No data or files provided for update"}), 400
     
+    # Read before the try so the error log below can't fail on a non-dict JSON body
+    code = data.get('code') if isinstance(data, dict) else None
+    new_documents = []
     try:
-        code = data.get('code')
         description = data.get('description')
         
         new_project = Project(
@@ -43,63 +58,54 @@ def create_project():
         db.session.add(new_project)
         db.session.flush()
         
+        # The creator is always a member so project managers can keep working on it
+        db.session.add(ProjectMember(project_id = new_project.id, user_id = g.current_user_id))
+        
         
         project_folder = os.path.join(current_app.config['PROJECTS_UPLOAD_FOLDER'], code)
         os.makedirs(project_folder, exist_ok = True)
         
-        files = request.files.getlist('documents')
-        for file in files:
-            if file.filename:
-                
-                file.seek(0, 2)  # Seek to end to get size
-                file_size = file.tell()
-                file.seek(0)
-                
-                filename = secure_filename(file.filename)
-                unique_name = f"{uuid.uuid4().hex}_{filename}"
-                file_path = os.path.join(project_folder, unique_name)
-                file.save(file_path)
-                
-                document = ProjectDocument(
-                    project_id=new_project.id,
-                    filename=unique_name,
-                    original_filename=filename,
-                    file_path=file_path,
-                    file_size=os.path.getsize(file_path),
-                    file_type=file.content_type
-                )
-                
-                #document.validate_file_size()
-                
-                db.session.add(document)
+        # Files are written and hashed in parallel, then all rows go in with one add_all
+        new_documents = save_documents(
+            request.files.getlist('documents'),
+            new_project.id,
+            project_folder,
+            current_app.config['UPLOAD_WORKERS'],
+            validate = False
+        )
+        db.session.add_all(new_documents)
                 
+        queue_project_documents_email(new_project, new_documents)
         db.session.commit()
-        print("Request form:", request.form)
-        print("Request files:", request.files)
-        print("Files list:", request.files.getlist('documents'))
+        logger.debug("Created project %s with %s documents", code, len(new_documents))
         return jsonify(new_project.serialize()), 200
     
     except Exception as e:
         db.session.rollback()
-        print("Request form:", request.form)
-        print("Request files:", request.files)
-        print("Files list:", request.files.getlist('documents'))
+        remove_documents(new_documents)
+        logger.error(
+            "Error creating project %s: %s", code, e,
+            extra = {"form_fields": list(request.form.keys()), "file_count": len(request.files.getlist('documents'))}
+        )
         return jsonify({"error": str(e)}), 500
                 
                 
                 
 @projects_bp.route('/all', methods = ['GET'])
-@jwt_required()
+@permission_required('projects:read')
 def get_all_projects():
-    all_projects = Project.query.all()
+    query = Project.query
+    if g.permission_scope != ANY:
+        query = query.join(ProjectMember).filter(ProjectMember.user_id == g.current_user_id)
+    all_projects = query.all()
     return jsonify([project.serialize() for project in all_projects]), 200
 
 
 
 @projects_bp.route('/<string:code>', methods = ['GET'])
-@jwt_required()
+@permission_required('projects:read')
 def get_project_by_code(code):
-    project = Project.query.filter_by(code = code).first()
+    project = _get_project(code)
     if not project:
         return jsonify({"error": "Project not found"}), 404
     
@@ -108,9 +114,9 @@ def get_project_by_code(code):
 
 
 @projects_bp.route('/<string:code>', methods = ['PUT'])
-@jwt_required()
+@permission_required('projects:update')
 def update_project(code):
-    project = Project.query.filter_by(code = code).first()
+    project = _get_project(code)
     
     if not project:
         return jsonify({"error":"Project not found"}), 404 
@@ -123,51 +129,36 @@ def update_project(code):
     if not data and not request.files:
         return jsonify({"error": "No data or files provided for update"}), 400
     
+    new_documents = []
     try:
         if 'description' in data:
             project.description = data['description']
         if 'documents' in request.files and request.files['documents'] != '':
-            files = request.files.getlist('documents')
             project_folder = os.path.join(current_app.config['PROJECTS_UPLOAD_FOLDER'], code)
             os.makedirs(project_folder, exist_ok=True)
-            for file in files:
-                if file.filename:
-                    
-                    file.seek(0, 2)  # Seek to end to get size
-                    file_size = file.tell()
-                    file.seek(0)
-                    
-                    filename = secure_filename(file.filename)
-                    unique_name = f"{uuid.uuid4().hex}_{filename}"
-                    file_path = os.path.join(project_folder, unique_name)
-                    file.save(file_path)
-                    
-                    document = ProjectDocument(
-                        project_id=project.id,
-                        filename=unique_name,
-                        original_filename=filename,
-                        file_path=file_path,
-                        file_size=os.path.getsize(file_path),
-                        file_type=file.content_type
-                    )
-                    
-                    document.validate_file_size()
-                    
-                    db.session.add(document)
+            new_documents = save_documents(
+                request.files.getlist('documents'),
+                project.id,
+                project_folder,
+                current_app.config['UPLOAD_WORKERS']
+            )
+            db.session.add_all(new_documents)
         
+        queue_project_documents_email(project, new_documents)
         db.session.commit()
         return jsonify(project.serialize()), 200
     
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating project {code}: {e}")
+        remove_documents(new_documents)
+        logger.error("Error updating project %s: %s", code, e)
         return jsonify({"error": "Failed to update project", "details": str(e)}), 500
             
 
 @projects_bp.route('/documents/<int:doc_id>', methods = ['DELETE'])
-@jwt_required()
+@permission_required('documents:delete')
 def delete_document(doc_id):
-    document = ProjectDocument.query.get(doc_id)
+    document = _get_document(doc_id)
     if not document:
         return jsonify({"error": "Document not found"}), 404 
     
@@ -181,14 +172,14 @@ def delete_document(doc_id):
     
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting document {doc_id}: {e}")
+        logger.error("Error deleting document %s: %s", doc_id, e)
         return jsonify({"error": "Failed to delete document", "details": str(e)}), 500
     
     
 @projects_bp.route('/<string:code>', methods=['DELETE'])
-@jwt_required()
+@permission_required('projects:delete')
 def delete_project(code):
-    project = Project.query.filter_by(code=code).first()
+    project = _get_project(code)
     if not project:
         return jsonify({"error": "Project not found"}), 404 
     
@@ -207,12 +198,60 @@ def delete_project(code):
         
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting project {code}: {e}")
+        logger.error("Error deleting project %s: %s", code, e)
         return jsonify({"error": "Failed to delete project", "details": str(e)}), 500
     
     
 
 @projects_bp.route('/documents/<int:doc_id>/download')
+@permission_required('documents:download')
 def download_document(doc_id):
-    document = ProjectDocument.query.get_or_404(doc_id)
-    return send_file(document.file_path, as_attachment=True, download_name=document.original_filename)
\ No newline at end of file
+    document = g.get('document') or ProjectDocument.query.get_or_404(doc_id)
+    return send_file(document.file_path, as_attachment=True, download_name=document.original_filename)
+
+
+
+@projects_bp.route('/<string:code>/members', methods = ['POST'])
+@permission_required('projects:manage_members')
+def add_project_member(code):
+    project = _get_project(code)
+    if not project:
+        return jsonify({"error": "Project not found"}), 404
+    
+    data = request.get_json(silent = True) or {}
+    user = User.query.get(data.get('user_id')) if data.get('user_id') is not None else None
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    
+    if ProjectMember.query.get((project.id, user.id)):
+        return jsonify({"error": "User is already a member of this project"}), 409
+    
+    try:
+        db.session.add(ProjectMember(project_id = project.id, user_id = user.id))
+        db.session.commit()
+        return jsonify(project.serialize()), 201
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error adding member %s to project %s: %s", user.id, code, e)
+        return jsonify({"error": "Failed to add project member", "details": str(e)}), 500
+    
+    
+@projects_bp.route('/<string:code>/members/<int:member_id>', methods = ['DELETE'])
+@permission_required('projects:manage_members')
+def remove_project_member(code, member_id):
+    project = _get_project(code)
+    if not project:
+        return jsonify({"error": "Project not found"}), 404
+    
+    member = ProjectMember.query.get((project.id, member_id))
+    if not member:
+        return jsonify({"error": "User is not a member of this project"}), 404
+    
+    try:
+        db.session.delete(member)
+        db.session.commit()
+        return jsonify({"message": "Project member removed successfully"}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error removing member %s from project %s: %s", member_id, code, e)
+        return jsonify({"error": "Failed to remove project member", "details": str(e)}), 500
@@ -1,22 +1,27 @@
-from flask import Blueprint, request, Response, jsonify, url_for, current_app, redirect 
+from flask import Blueprint, request, Response, jsonify, url_for, current_app, redirect, g 
 import requests
 from config import Config 
 from models.UsersModel import User
 from database import db
+from mailer import queue_welcome_email, queue_password_reset_email
+from permissions import ALLOWED_ROLES, ANY, permission_required, token_claims
+from models.ProjectsModel import ProjectMember
 import string
 import random
 import os
 from werkzeug.utils import secure_filename
 import uuid
+import secrets
 from PIL import Image
 from itsdangerous import URLSafeTimedSerializer as Serializer, SignatureExpired, BadTimeSignature 
 import datetime 
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+import logging
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
 
 users_bp = Blueprint('users_bp', __name__)
 
+logger = logging.getLogger(__name__)
 
-ALLOWED_ROLES = ['root','admin', 'project manager', 'team member']
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 UPLOAD_FOLDER = Config.UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -41,21 +46,21 @@ def process_profile_picture(filepath):
         img.save(filepath) 
         return filepath
     except Exception as e:
-        current_app.logger.error(f"Error processing image {filepath}: {e}")
+        logger.error("Error processing image %s: %s", filepath, e)
         return filepath # Return original path, indicating processing failed.
     
     
 def generate_random_password(email):
-    """Generates a predictable password for development."""
-    if '@' in email:
-        username = email.split('@')[0]
-        return f"{username}@123"
-    else:
-        return "default123" 
+    """
+    Generates an unguessable initial password. It is never shown to anyone:
+    new users choose their own through the set-password link in the welcome email.
+    """
+    return secrets.token_urlsafe(24)
 
 
 
 @users_bp.route('/', methods = ['POST'])
+@permission_required('users:create')
 def create_user():
     data = request.get_json(silent = True)
     if data is None: 
@@ -84,7 +89,7 @@ def create_user():
                 processed_file_path = process_profile_picture(file_path)
                 profile_pic_path = f"/static/profile_pics/{os.path.basename(processed_file_path)}"
             except Exception as e:
-                current_app.logger.error(f"Error during profile picture save/process for create_user: {e}")
+                logger.error("Error during profile picture save/process for create_user: %s", e)
                 return jsonify({"error": "Failed to save or process profile picture"}), 500
         else:
             return jsonify({"error": "Invalid file type for profile picture"}), 400
@@ -109,24 +114,28 @@ def create_user():
         )
         
         db.session.add(new_user)
+        db.session.flush()
+        set_password_url = f"{current_app.config['FRONTEND_RESET_PASSWORD_URL']}/{new_user.get_reset_token(purpose = 'welcome')}"
+        queue_welcome_email(new_user, set_password_url)
         db.session.commit()
         
-        return jsonify({**new_user.serialize(), "generated_password": password}), 201
+        return jsonify(new_user.serialize()), 201
     
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error during profile picture save/process for create_user: {e}")
+        logger.error("Error creating user %s: %s", email, e)
         return jsonify({"error": str(e)})
     
 
 @users_bp.route('/all', methods = ['GET'])
+@permission_required('users:read_all')
 def get_all_users():
     users = User.query.all()
     return jsonify([user.serialize() for user in users]), 200 
 
 
 @users_bp.route('/profile', methods = ['GET'])
-@jwt_required()
+@permission_required('users:profile')
 def get_user_by_id():
     current_user_id = get_jwt_identity()
     user = User.query.filter_by(email = current_user_id).first()
@@ -137,6 +146,7 @@ def get_user_by_id():
 
 
 @users_bp.route('/<int:user_id>', methods=['PUT'])
+@permission_required('users:update')
 def update_user(user_id):
     """
     Updates an existing user's general information (excluding password).
@@ -154,6 +164,10 @@ def update_user(user_id):
     
     if not data and not request.files:
         return jsonify({"error": "No data or files provided for update"}), 400
+    
+    # Users editing their own record may not promote or (de)activate themselves
+    if g.permission_scope != ANY and ('role' in data or 'isActive' in data):
+        return jsonify({"error": "Permission denied"}), 403
 
     try:
         if 'email' in data:
@@ -190,7 +204,7 @@ def update_user(user_id):
                     processed_file_path = process_profile_picture(file_path)
                     user.profile_pic = f"/static/profile_pics/{os.path.basename(processed_file_path)}"
                 except Exception as e:
-                    current_app.logger.error(f"Error during profile picture save/process for update_user: {e}")
+                    logger.error("Error during profile picture save/process for update_user: %s", e)
                     return jsonify({"error": "Failed to save or process profile picture"}), 500
             else:
                 return jsonify({"error": "Invalid file type for profile picture"}), 400
@@ -218,13 +232,13 @@ def update_user(user_id):
     
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error updating user {user_id}: {e}")
+        logger.error("Error updating user %s: %s", user_id, e)
         return jsonify({"error": "Failed to update user", "details": str(e)}), 500
     
 
 
 @users_bp.route('/change_password', methods = ['PUT'])
-@jwt_required()
+@permission_required('users:change_password')
 def change_user_password():
     
     current_user_id = get_jwt_identity()
@@ -246,12 +260,13 @@ def change_user_password():
         return jsonify({"message": "Password updated successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error changing password for user {current_user_id}: {e}")
+        logger.error("Error changing password for user %s: %s", current_user_id, e)
         return jsonify({"error": "Failed to change password", "details": str(e)}), 500
     
     
     
 @users_bp.route('/<int:user_id>/status', methods = ['PATCH'])
+@permission_required('users:toggle_status')
 def toggle_user_status(user_id):
     user = User.query.get(user_id)
     if not user:
@@ -263,6 +278,7 @@ def toggle_user_status(user_id):
     return jsonify({"message": f"User {'activated' if user.isActive else 'deactivated'}"})
     
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
+@permission_required('users:delete')
 def delete_user(user_id):
     """
     Deletes a user by ID.
@@ -278,12 +294,13 @@ def delete_user(user_id):
             os.path.exists(os.path.join(current_app.root_path, user.profile_pic.lstrip('/'))):
             os.remove(os.path.join(current_app.root_path, user.profile_pic.lstrip('/')))
 
+        ProjectMember.query.filter_by(user_id = user.id).delete()
         db.session.delete(user)
         db.session.commit()
         return jsonify({"message": f"User {user_id} deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        current_app.logger.error(f"Error deleting user {user_id}: {e}")
+        logger.error("Error deleting user %s: %s", user_id, e)
         return jsonify({"error": "Failed to delete user", "details": str(e)}), 500
     
     
@@ -307,8 +324,8 @@ def login():
             return jsonify({"error": "Account is deactivated. Please contact administrator."}), 403
             
         
-        access_token = create_access_token(identity = user.email)
-        refresh_token = create_refresh_token(identity = user.email)
+        access_token = create_access_token(identity = user.email, additional_claims = token_claims(user))
+        refresh_token = create_refresh_token(identity = user.email, additional_claims = token_claims(user))
         
         user.last_login = datetime.datetime.now()
         db.session.commit()
@@ -319,4 +336,52 @@ def login():
             'user': user.serialize()
         }), 200
     
-    return jsonify({"error":"Invalid credentials"}), 401
\ No newline at end of file
+    return jsonify({"error":"Invalid credentials"}), 401
+
+
+
+@users_bp.route('/reset_password', methods = ['POST'])
+def request_password_reset():
+    data = request.get_json(silent = True) or {}
+    email = data.get('email')
+    
+    if not email:
+        return jsonify({"error": "Email is required"}), 400
+    
+    # Same response whether or not the account exists, so emails cannot be enumerated
+    message = {"message": "If the account exists, a password reset email has been sent"}
+    
+    user = User.query.filter_by(email = email).first()
+    if not user or not user.isActive:
+        return jsonify(message), 200
+    
+    try:
+        reset_url = f"{current_app.config['FRONTEND_RESET_PASSWORD_URL']}/{user.get_reset_token()}"
+        queue_password_reset_email(user, reset_url)
+        db.session.commit()
+        return jsonify(message), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error queueing password reset for %s: %s", email, e)
+        return jsonify({"error": "Failed to request password reset", "details": str(e)}), 500
+    
+    
+@users_bp.route('/reset_password/<string:token>', methods = ['POST'])
+def reset_password(token):
+    user = User.verify_reset_token(token)
+    if not user:
+        return jsonify({"error": "Invalid or expired token"}), 400
+    
+    data = request.get_json(silent = True) or {}
+    new_password = data.get('new_password')
+    if not new_password:
+        return jsonify({"error": "Missing new_password"}), 400
+    
+    try:
+        user.set_password(new_password)
+        db.session.commit()
+        return jsonify({"message": "Password has been reset successfully"}), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Error resetting password for user %s: %s", user.id, e)
+        return jsonify({"error": "Failed to reset password", "details": str(e)}), 500
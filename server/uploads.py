@@ -0,0 +1,110 @@
+from werkzeug.utils import secure_filename
+from models.ProjectsModel import ProjectDocument
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
+import threading
+import hashlib
+import uuid
+import os
+
+
+DEFAULT_MIME_TYPE = 'application/octet-stream'
+CHUNK_SIZE = 1024 * 1024
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(max_workers):
+    """One shared, bounded pool per size, so concurrent requests cannot spawn unbounded threads."""
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = 'k-boss-upload')
+            _executors[max_workers] = executor
+        return executor
+
+
+def guess_mime_type(mimetype, filename):
+    """Prefers the type sent by the client, then guesses from the file extension."""
+    if mimetype and mimetype != DEFAULT_MIME_TYPE:
+        return mimetype
+    guessed, _ = mimetypes.guess_type(filename)
+    return guessed or DEFAULT_MIME_TYPE
+
+
+def save_document(file, project_id, project_folder, validate = True):
+    """
+    Copies one uploaded file to disk in chunks, hashing it on the way, and
+    returns its (unsaved) ProjectDocument. File writes and SHA-256 both
+    release the GIL, so several of these run in parallel on the pool.
+    """
+    filename = secure_filename(file.filename)
+    unique_name = f"{uuid.uuid4().hex}_{filename}"
+    file_path = os.path.join(project_folder, unique_name)
+
+    digest = hashlib.sha256()
+    with open(file_path, 'wb') as out:
+        while chunk := file.stream.read(CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+
+    document = ProjectDocument(
+        project_id = project_id,
+        filename = unique_name,
+        original_filename = filename,
+        file_path = file_path,
+        file_size = os.path.getsize(file_path),
+        file_type = guess_mime_type(file.mimetype, filename),
+        checksum = digest.hexdigest()
+    )
+
+    if validate:
+        try:
+            document.validate_file_size()
+        except ValueError:
+            os.remove(file_path)
+            raise
+
+    return document
+
+
+def save_documents(files, project_id, project_folder, max_workers, validate = True):
+    """
+    Saves all uploaded files concurrently on the shared pool and returns their
+    ProjectDocuments in upload order, ready for a single add_all().
+    If any file fails, the files already written are removed and the error is re-raised.
+    """
+    files = [file for file in files if file.filename]
+    if len(files) <= 1 or max_workers <= 1:
+        documents = []
+        for file in files:
+            try:
+                documents.append(save_document(file, project_id, project_folder, validate))
+            except Exception:
+                remove_documents(documents)
+                raise
+        return documents
+
+    executor = get_executor(max_workers)
+    futures = [executor.submit(save_document, file, project_id, project_folder, validate) for file in files]
+
+    documents = []
+    error = None
+    for future in futures:
+        try:
+            documents.append(future.result())
+        except Exception as e:
+            # Keep waiting so every written file is known before cleaning up
+            error = error or e
+
+    if error is not None:
+        remove_documents(documents)
+        raise error
+    return documents
+
+
+def remove_documents(documents):
+    for document in documents:
+        if os.path.exists(document.file_path):
+            os.remove(document.file_path)